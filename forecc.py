@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
-from prophet import Prophet
 import matplotlib.pyplot as plt
+from hier_forecast import RECONCILIATION_METHODS, forecast_hierarchy
 
 # 🔧 Streamlit page config
 st.set_page_config(page_title="AI-Powered Clothing Sales Dashboard", layout="wide")
@@ -49,79 +49,65 @@ if uploaded_file:
             # ===============================
             st.header("📉 Sales Forecasting (Next 6 Months)")
 
-            model = Prophet(daily_seasonality=True)
-            model.fit(df_grouped)
-
-            future = model.make_future_dataframe(periods=180)
-            forecast = model.predict(future)
-
-            fig = model.plot(forecast)
+            # Hierarchical forecast: bottom series are fitted once, every level above is their sum
+            method = st.sidebar.selectbox("Forecast reconciliation", list(RECONCILIATION_METHODS))
+            levels = ["Category", "Product"] if 'Product' in df.columns else ["Category"]
+            bottom_level = st.sidebar.radio("Forecast bottom level", levels)
+            product_col = 'Product' if bottom_level == "Product" else None
+
+            # Only the top categories get their own series, the rest are forecast together as "Other"
+            forecast = forecast_hierarchy(df, 'Date', 'Category', 'Quantity', 'Revenue', product_col=product_col,
+                                          categories=top_categories.index, periods=180,
+                                          method=RECONCILIATION_METHODS[method])
+            future_forecast = forecast[forecast['ds'] > df['Date'].max()]
+
+            total_forecast = forecast[forecast['Level'] == 'Total']
+            fig, ax = plt.subplots(figsize=(10, 6))
+            ax.plot(df_grouped['ds'], df_grouped['y'], 'k.', label='Actual')
+            ax.plot(total_forecast['ds'], total_forecast['Revenue'], color='#0072B2', label='Forecast')
+            ax.fill_between(total_forecast['ds'], total_forecast['Revenue Lower'], total_forecast['Revenue Upper'],
+                            color='#0072B2', alpha=0.2, label='Rough range')
+            ax.set_xlabel('ds')
+            ax.set_ylabel('y')
+            ax.legend()
             st.pyplot(fig)
+            st.caption("The forecast line is reconciled, so categories add up to the total. "
+                       "The shaded range is only a rough band, summed from the per-category (or per-product) intervals.")
 
             # Forecast metrics
+            total_future = future_forecast[future_forecast['Level'] == 'Total']
             st.subheader("📈 Forecasted Sales Metrics")
-            st.write(f"Predicted Sales (Next 1 Month): ₹{forecast['yhat'].tail(30).sum():,.0f}")
-            st.write(f"Predicted Sales (Next 6 Months): ₹{forecast['yhat'].tail(180).sum():,.0f}")
+            st.write(f"Predicted Sales (Next 1 Month): ₹{total_future['Revenue'].head(30).sum():,.0f}")
+            st.write(f"Predicted Sales (Next 6 Months): ₹{total_future['Revenue'].sum():,.0f}")
 
             # 📄 Download Forecast Data
-            forecast_download = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+            forecast_download = total_forecast[['ds', 'Revenue', 'Revenue Lower', 'Revenue Upper']].rename(
+                columns={'Revenue': 'yhat', 'Revenue Lower': 'yhat_lower', 'Revenue Upper': 'yhat_upper'})
             st.download_button("💾 Download Forecasted Sales Data", forecast_download.to_csv(index=False), file_name="forecasted_sales.csv")
 
+            # Top category totals over the next 3 months, taken from the same reconciled forecast.
+            # Categories with too little data are left out here.
+            next_90 = future_forecast[(future_forecast['Level'] == 'Category') & ~future_forecast['Low Data'] &
+                                      (future_forecast['ds'] <= df['Date'].max() + pd.Timedelta(days=90))]
+            category_totals = next_90.groupby('Category')[['Revenue', 'Quantity']].sum()
+            category_totals = category_totals.reindex(top_categories.index).dropna()
+
             # ===============================
             # 📦 Category-wise Forecasts
             # ===============================
             st.header("📊 Category-wise Revenue Forecast (Next 3 Months)")
 
-            category_forecasts = []
-
-            for category in top_categories.index:
-                cat_df = df[df['Category'] == category]
-                if len(cat_df) < 30:
-                    continue
-
-                daily_rev = cat_df.groupby('Date').agg({'Revenue': 'sum'}).reset_index()
-                daily_rev = daily_rev.rename(columns={'Date': 'ds', 'Revenue': 'y'})
-
-                cat_model = Prophet(daily_seasonality=True)
-                cat_model.fit(daily_rev)
-
-                future_cat = cat_model.make_future_dataframe(periods=90)
-                forecast_cat = cat_model.predict(future_cat)
-
-                revenue_sum = forecast_cat.tail(90)['yhat'].sum()
-                category_forecasts.append({'Category': category, 'Forecasted Revenue': round(revenue_sum)})
-
-            category_forecast_df = pd.DataFrame(category_forecasts)
-            st.dataframe(category_forecast_df.set_index('Category'))
+            category_forecast_df = category_totals[['Revenue']].round()
+            category_forecast_df = category_forecast_df.rename(columns={'Revenue': 'Forecasted Revenue'})
+            st.dataframe(category_forecast_df)
 
             # ===============================
             # 📦 Inventory Recommendation
             # ===============================
             st.header("📦 Inventory Recommendation (Next 3 Months)")
 
-            inventory_recommendation = []
-
-            for category in top_categories.index:
-                cat_df = df[df['Category'] == category]
-                if len(cat_df) < 30:
-                    continue
-
-                daily_qty = cat_df.groupby('Date').agg({'Quantity': 'sum'}).reset_index()
-                daily_qty = daily_qty.rename(columns={'Date': 'ds', 'Quantity': 'y'})
-
-                cat_model_qty = Prophet(daily_seasonality=True)
-                cat_model_qty.fit(daily_qty)
-
-                future_qty = cat_model_qty.make_future_dataframe(periods=90)
-                forecast_qty = cat_model_qty.predict(future_qty)
-
-                total_forecast_qty = forecast_qty.tail(90)['yhat'].sum()
-                inventory_recommendation.append({
-                    'Category': category,
-                    'Forecasted Quantity': round(total_forecast_qty)
-                })
-
-            inv_df = pd.DataFrame(inventory_recommendation)
+            inv_df = category_totals[['Quantity']].round().reset_index()
+            inv_df = inv_df.rename(columns={'Quantity': 'Forecasted Quantity'})
             inv_df['% of Total Inventory'] = (inv_df['Forecasted Quantity'] / inv_df['Forecasted Quantity'].sum() * 100).round(2)
 
             st.subheader("🧾 Suggested Inventory Split")
@@ -1,9 +1,9 @@
 import random
 import pandas as pd
 from datetime import datetime, timedelta
-from prophet import Prophet
 import matplotlib.pyplot as plt
 import streamlit as st
+from hier_forecast import RECONCILIATION_METHODS, forecast_hierarchy
 
 # Bakery data options
 products_bakery = ["Chocolate Cake", "Vanilla Cupcake", "Fruit Tart", "Brownie", "Muffin", "Croissant", "Cheese Pastry", "Sourdough"]
@@ -96,37 +96,49 @@ else:
 daily_rev = df.groupby("Order Date").agg({"Total Revenue": "sum"}).reset_index()
 renamed_rev = daily_rev.rename(columns={"Order Date": "ds", "Total Revenue": "y"})
 
+# Hierarchical forecast: bottom series are fitted once, categories and total are their sums
+method = st.sidebar.selectbox("Forecast reconciliation", list(RECONCILIATION_METHODS))
+levels = ["Category", "Product"] if "Product Name" in df.columns else ["Category"]
+bottom_level = st.sidebar.radio("Forecast bottom level", levels)
+product_col = "Product Name" if bottom_level == "Product" else None
+try:
+    forecast = forecast_hierarchy(df, "Order Date", "Category", "Quantity Sold", "Total Revenue",
+                                  product_col=product_col, periods=180, method=RECONCILIATION_METHODS[method])
+except ValueError as e:
+    st.error(f"Cannot forecast: {e}")
+    st.stop()
+last_date = df["Order Date"].max()
+
 # Forecast total revenue next 6 months
 st.header("📈 Overall Sales Forecast")
-model_rev = Prophet(daily_seasonality=True)
-model_rev.fit(renamed_rev)
-future_rev = model_rev.make_future_dataframe(periods=180)
-forecast_rev = model_rev.predict(future_rev)
-
-fig1 = model_rev.plot(forecast_rev)
+forecast_rev = forecast[forecast["Level"] == "Total"]
+
+fig1, ax1 = plt.subplots(figsize=(10, 6))
+ax1.plot(renamed_rev["ds"], renamed_rev["y"], "k.", label="Actual")
+ax1.plot(forecast_rev["ds"], forecast_rev["Revenue"], color="#0072B2", label="Forecast")
+ax1.fill_between(forecast_rev["ds"], forecast_rev["Revenue Lower"], forecast_rev["Revenue Upper"],
+                 color="#0072B2", alpha=0.2, label="Rough range")
+ax1.set_xlabel("ds")
+ax1.set_ylabel("y")
+ax1.legend()
 st.pyplot(fig1)
+st.caption("The forecast line is reconciled, so categories add up to the total. "
+           "The shaded range is only a rough band, summed from the per-category (or per-product) intervals.")
 
 # Summary metrics
-next_30 = forecast_rev[forecast_rev['ds'] > pd.Timestamp.today()].head(30)['yhat'].sum()
-next_180 = forecast_rev[forecast_rev['ds'] > pd.Timestamp.today()].head(180)['yhat'].sum()
+next_30 = forecast_rev[forecast_rev['ds'] > pd.Timestamp.today()].head(30)['Revenue'].sum()
+next_180 = forecast_rev[forecast_rev['ds'] > pd.Timestamp.today()].head(180)['Revenue'].sum()
 st.subheader("Sales Forecast Summary")
 st.write(f"Forecast next 30 days revenue: ₹{next_30:,.0f}")
 st.write(f"Forecast next 6 months revenue: ₹{next_180:,.0f}")
 
 # Forecast quantity by category
 st.header("📊 Category-wise Quantity Forecast (Next 3 Months)")
-cat_forecasts = []
-for cat, group in df.groupby('Category'):
-    daily_qty = group.groupby('Order Date').agg({'Quantity Sold': 'sum'}).reset_index()
-    if len(daily_qty) < 30:
-        continue
-    df_qty = daily_qty.rename(columns={'Order Date': 'ds', 'Quantity Sold': 'y'})
-    model_qty = Prophet(daily_seasonality=True)
-    model_qty.fit(df_qty)
-    future_qty = model_qty.make_future_dataframe(periods=90)
-    forecast_qty = model_qty.predict(future_qty)
-    total_qty = forecast_qty.tail(90)['yhat'].sum()
-    cat_forecasts.append({'Category': cat, 'Forecasted Quantity': int(total_qty)})
+# Categories with too little data are not listed
+next_90 = forecast[(forecast["Level"] == "Category") & ~forecast["Low Data"] &
+                   (forecast["ds"] > last_date) & (forecast["ds"] <= last_date + pd.Timedelta(days=90))]
+cat_forecasts = [{'Category': cat, 'Forecasted Quantity': int(qty)}
+                 for cat, qty in next_90.groupby('Category')['Quantity'].sum().items()]
 
 cat_df = pd.DataFrame(cat_forecasts)
 
@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from prophet import Prophet
+
+# Hierarchical forecasting shared by the dashboards.
+# Daily quantity is forecast over the date x category (x product) tree, all
+# Prophet fits running in one joblib batch. Bottom-up fits only the bottom
+# level (category or product) and sums it up; MinT fits every node and
+# reconciles the base forecasts. Either way every upper level (category,
+# total) is the sum of its children, so the numbers always add up.
+# Revenue comes from the same fit: each bottom series' quantity forecast times
+# the trend of its revenue per unit, so price, discount and mix shifts carry on.
+# That keeps it to one Prophet fit per bottom series (one per node for MinT),
+# where the dashboards used to fit total revenue plus revenue and quantity for
+# every category. Bottom series with too little data are folded into an
+# "Other" series under their parent, and the dashboards can pass the categories
+# they show so everything else is folded too.
+
+RECONCILIATION_METHODS = {"Bottom-up": "bottom_up", "MinT": "mint"}
+OTHER = "Other (low data)"
+
+
+def _fit_predict(values, dates, periods):
+    history = pd.DataFrame({'ds': dates, 'y': values})
+    model = Prophet(daily_seasonality=True)
+    model.fit(history)
+    future = model.make_future_dataframe(periods=periods)
+    forecast = model.predict(future)
+    return forecast[['yhat', 'yhat_lower', 'yhat_upper']].to_numpy().T
+
+
+def _fit_all(series, dates, periods, n_jobs):
+    # Fit every series in one batch, spread over the available cores.
+    # Returns an array of shape (series, [yhat, lower, upper], days).
+    fitted = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_predict)(values, dates, periods) for values in series
+    )
+    return np.stack(fitted)
+
+
+def summing_matrix(bottom_keys):
+    """Build the node list and summing matrix S for a total > category > product tree.
+
+    Nodes are tuples: () is the total, (category,) a category and
+    (category, product) a product. S[i, j] is 1 when bottom series j rolls up into node i.
+    """
+    depth = len(bottom_keys[0])
+    nodes = [()]
+    for level in range(1, depth + 1):
+        for key in bottom_keys:
+            if key[:level] not in nodes:
+                nodes.append(key[:level])
+    S = np.array([[1.0 if key[:len(node)] == node else 0.0 for key in bottom_keys] for node in nodes])
+    return nodes, S
+
+
+def _shrunk_covariance(residuals):
+    # Sample covariance shrunk towards its diagonal (Schafer-Strimmer), as used by MinT
+    n_series, n_obs = residuals.shape
+    centred = residuals - residuals.mean(axis=1, keepdims=True)
+    sample = centred @ centred.T / n_obs
+    std = np.sqrt(np.diag(sample))
+    std[std == 0] = 1.0
+    scaled = centred / std[:, None]
+    corr = scaled @ scaled.T / n_obs
+    corr_var = ((scaled ** 2) @ (scaled ** 2).T - n_obs * corr ** 2) * n_obs / (n_obs - 1) ** 3
+    off_diag = ~np.eye(len(corr), dtype=bool)
+    denom = (corr[off_diag] ** 2).sum()
+    shrinkage = 1.0 if denom == 0 else min(max(corr_var[off_diag].sum() / denom, 0.0), 1.0)
+    W = shrinkage * np.diag(np.diag(sample)) + (1 - shrinkage) * sample
+    # Series fitted perfectly (e.g. all zeros) would make W singular
+    variances = np.diag(sample)
+    floor = variances[variances > 0].min() if (variances > 0).any() else 1.0
+    W[np.diag_indices(n_series)] = np.where(variances > 0, np.diag(W), floor)
+    return W
+
+
+def _mint(history_all, base, S):
+    # Reconcile base forecasts for every node into a bottom-level forecast
+    W_inv = np.linalg.pinv(_shrunk_covariance(history_all - base[:, :history_all.shape[1]]))
+    G = np.linalg.pinv(S.T @ W_inv @ S) @ S.T @ W_inv
+    return G @ base
+
+
+def _price_trend(qty, rev, n_days):
+    # Linear trend of revenue per unit, weighted by units sold on each day
+    days = np.flatnonzero(qty > 0)
+    if len(days) == 0:
+        return np.zeros(n_days)
+    price = rev[days] / qty[days]
+    if len(days) < 2:
+        return np.full(n_days, price[0])
+    coef = np.polyfit(days, price, 1, w=np.sqrt(qty[days]))
+    return np.clip(np.polyval(coef, np.arange(n_days)), 0, None)
+
+
+def _fold_sparse(frame, sparse):
+    # Merge the sparse bottom series into an OTHER sibling under the same parent
+    keys = [key[:-1] + (OTHER,) if is_sparse else key for key, is_sparse in zip(frame.columns, sparse)]
+    frame = frame.copy()
+    frame.columns = pd.MultiIndex.from_tuples(keys)
+    return frame.T.groupby(level=list(range(frame.columns.nlevels))).sum().T
+
+
+def forecast_hierarchy(df, date_col, category_col, qty_col, rev_col, product_col=None, categories=None,
+                       periods=180, method="bottom_up", min_days=30, n_jobs=-1):
+    """Forecast quantity and revenue for the whole date x category x product hierarchy.
+
+    Returns a long DataFrame with one row per node and day (history and the next
+    `periods` days) holding the reconciled 'Quantity' and 'Revenue', plus
+    'Quantity Lower/Upper' and 'Revenue Lower/Upper': a rough band made by summing
+    the bottom-level Prophet intervals. The 'Level' column is 'Total', 'Category'
+    or 'Product'. 'Low Data' marks nodes with sales on fewer than `min_days` days
+    and the OTHER series.
+
+    method='bottom_up' fits only the bottom series. method='mint' also fits every
+    aggregate and reconciles all base forecasts with MinT (shrinkage covariance of
+    the in-sample residuals), which costs one fit per node. Bottom series with
+    sales on fewer than `min_days` days, and categories not in `categories` when
+    it is given, are folded into an OTHER series.
+    """
+    if method not in RECONCILIATION_METHODS.values():
+        raise ValueError(f"Unknown reconciliation method: {method}")
+
+    levels = [category_col] + ([product_col] if product_col else [])
+    daily = df.assign(**{date_col: pd.to_datetime(df[date_col]).dt.normalize()})
+    if categories is not None:
+        folded = ~daily[category_col].isin(categories)
+        for col in levels:
+            daily[col] = daily[col].where(~folded, OTHER)
+
+    pivot = dict(index=date_col, columns=levels, aggfunc='sum', fill_value=0)
+    qty = daily.pivot_table(values=qty_col, **pivot).resample('D').sum()
+    rev = daily.pivot_table(values=rev_col, **pivot).resample('D').sum().reindex(columns=qty.columns, fill_value=0)
+    qty.columns = rev.columns = pd.MultiIndex.from_tuples(
+        [key if isinstance(key, tuple) else (key,) for key in qty.columns])
+    if len(qty) < 2:
+        raise ValueError("At least 2 days of sales history are needed to forecast")
+
+    sparse = ((qty != 0).sum() < min_days).to_numpy()
+    if sparse.any():
+        qty, rev = _fold_sparse(qty, sparse), _fold_sparse(rev, sparse)
+
+    bottom_keys = [key if isinstance(key, tuple) else (key,) for key in qty.columns]
+    nodes, S = summing_matrix(bottom_keys)
+    dates = qty.index
+    n_days = len(dates) + periods
+    history = qty.to_numpy().T
+
+    if method == "mint":
+        history_all = S @ history
+        base = _fit_all(history_all, dates, periods, n_jobs)
+        bottom_base = base[-len(bottom_keys):]
+        bottom = _mint(history_all, base[:, 0], S)
+    else:
+        bottom_base = _fit_all(history, dates, periods, n_jobs)
+        bottom = bottom_base[:, 0]
+    # Bands keep each bottom series' own interval width around the reconciled forecast
+    lower = bottom - (bottom_base[:, 0] - bottom_base[:, 1])
+    upper = bottom + (bottom_base[:, 2] - bottom_base[:, 0])
+
+    # No negative sales; clipping the bottom level keeps the sums coherent
+    price = np.vstack([_price_trend(q, r, n_days) for q, r in zip(history, rev.to_numpy().T)])
+    bottom, lower, upper = (np.clip(values, 0, None) for values in (bottom, lower, upper))
+    all_dates = pd.date_range(dates[0], periods=n_days, freq='D')
+    sales_days = ((S @ history) != 0).sum(axis=1)
+
+    level_names = ['Total', 'Category', 'Product']
+    frames = []
+    for i, node in enumerate(nodes):
+        frame = pd.DataFrame({
+            'ds': all_dates,
+            'Quantity': S[i] @ bottom,
+            'Quantity Lower': S[i] @ lower,
+            'Quantity Upper': S[i] @ upper,
+            'Revenue': S[i] @ (bottom * price),
+            'Revenue Lower': S[i] @ (lower * price),
+            'Revenue Upper': S[i] @ (upper * price),
+        })
+        frame['Level'] = level_names[len(node)]
+        frame['Low Data'] = bool(sales_days[i] < min_days or OTHER in node)
+        for col, value in zip(levels, node):
+            frame[col] = value
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,118 @@
+import importlib.util
+import sys
+import types
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+class FakeProphet:
+    # Straight-line fit standing in for Prophet, so tests don't need cmdstan
+    def __init__(self, **kwargs):
+        pass
+
+    def fit(self, history):
+        if history['y'].notna().sum() < 2:
+            raise ValueError("Dataframe has less than 2 non-NaN rows.")
+        self.history = history
+        x = np.arange(len(history))
+        self.coef = np.polyfit(x, history['y'], 1)
+        self.spread = np.std(history['y'] - np.polyval(self.coef, x))
+
+    def make_future_dataframe(self, periods):
+        ds = pd.date_range(self.history['ds'].iloc[0], periods=len(self.history) + periods, freq='D')
+        return pd.DataFrame({'ds': ds})
+
+    def predict(self, future):
+        yhat = np.polyval(self.coef, np.arange(len(future)))
+        return pd.DataFrame({'ds': future['ds'], 'yhat': yhat,
+                             'yhat_lower': yhat - self.spread, 'yhat_upper': yhat + self.spread})
+
+
+@pytest.fixture
+def hf(monkeypatch):
+    # Load a private copy bound to the fake, leaving sys.modules as it was after the test
+    monkeypatch.setitem(sys.modules, 'prophet', types.SimpleNamespace(Prophet=FakeProphet))
+    spec = importlib.util.spec_from_file_location('hier_forecast', Path(__file__).with_name('hier_forecast.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_sales(n_days=60):
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2024-01-01', periods=n_days, freq='D')
+    rows = []
+    for category, products in {'Shirts': ['Polo', 'Tee'], 'Jeans': ['Slim']}.items():
+        for product in products:
+            for i, date in enumerate(dates):
+                quantity = int(rng.integers(1, 10))
+                rows.append([date, category, product, quantity, quantity * (200.0 + 5 * i)])
+    # Only a handful of sales: folded into "Other"
+    for date in dates[:5]:
+        rows.append([date, 'Jackets', 'Bomber', 1, 2000.0])
+    return pd.DataFrame(rows, columns=['Date', 'Category', 'Product', 'Quantity', 'Revenue'])
+
+
+def test_summing_matrix_follows_tree(hf):
+    nodes, S = hf.summing_matrix([('A', 'a1'), ('A', 'a2'), ('B', 'b1')])
+    assert nodes == [(), ('A',), ('B',), ('A', 'a1'), ('A', 'a2'), ('B', 'b1')]
+    np.testing.assert_array_equal(S, [[1, 1, 1], [1, 1, 0], [0, 0, 1], [1, 0, 0], [0, 1, 0], [0, 0, 1]])
+
+
+@pytest.mark.parametrize('method', ['bottom_up', 'mint'])
+@pytest.mark.parametrize('product_col', [None, 'Product'])
+def test_categories_sum_to_total(hf, method, product_col):
+    forecast = hf.forecast_hierarchy(make_sales(), 'Date', 'Category', 'Quantity', 'Revenue',
+                                     product_col=product_col, periods=30, method=method, n_jobs=1)
+    total = forecast[forecast['Level'] == 'Total'].set_index('ds')
+    columns = ['Quantity', 'Quantity Lower', 'Quantity Upper', 'Revenue', 'Revenue Lower', 'Revenue Upper']
+    assert len(total) == 60 + 30
+    assert not forecast[columns].isna().any().any()
+    for level in ['Category', 'Product'] if product_col else ['Category']:
+        summed = forecast[forecast['Level'] == level].groupby('ds')[columns].sum()
+        np.testing.assert_allclose(summed, total[columns])
+
+    low_data = set(forecast.loc[forecast['Low Data'], 'Category'])
+    assert low_data == ({'Jackets'} if product_col else {hf.OTHER})
+
+
+def test_revenue_follows_price_trend(hf):
+    forecast = hf.forecast_hierarchy(make_sales(), 'Date', 'Category', 'Quantity', 'Revenue', periods=30, n_jobs=1)
+    jeans = forecast[forecast['Category'] == 'Jeans']
+    unit_price = (jeans['Revenue'] / jeans['Quantity']).to_numpy()
+    np.testing.assert_allclose(unit_price[-1], 200.0 + 5 * 89)
+
+
+def test_categories_outside_list_are_folded(hf):
+    forecast = hf.forecast_hierarchy(make_sales(), 'Date', 'Category', 'Quantity', 'Revenue', product_col='Product',
+                                     categories=['Shirts'], periods=7, n_jobs=1)
+    products = forecast[forecast['Level'] == 'Product']
+    assert set(zip(products['Category'], products['Product'])) == {
+        ('Shirts', 'Polo'), ('Shirts', 'Tee'), (hf.OTHER, hf.OTHER)}
+
+
+@pytest.mark.parametrize('product_col', [None, 'Product'])
+def test_short_history_marks_categories_low_data(hf, product_col):
+    forecast = hf.forecast_hierarchy(make_sales(15), 'Date', 'Category', 'Quantity', 'Revenue',
+                                     product_col=product_col, periods=7, n_jobs=1)
+    categories = forecast[forecast['Level'] == 'Category']
+    assert categories['Low Data'].all()
+
+
+def test_time_of_day_is_kept(hf):
+    sales = make_sales()
+    shifted = sales.assign(Date=sales['Date'] + pd.Timedelta(hours=15))
+    forecast = hf.forecast_hierarchy(shifted, 'Date', 'Category', 'Quantity', 'Revenue', periods=0, n_jobs=1)
+    total = forecast[forecast['Level'] == 'Total']
+    assert len(total) == 60
+    assert (total['Quantity'] > 0).all()
+
+
+def test_single_day_is_rejected(hf):
+    sales = make_sales()
+    one_day = sales[sales['Date'] == sales['Date'].min()]
+    with pytest.raises(ValueError, match="2 days"):
+        hf.forecast_hierarchy(one_day, 'Date', 'Category', 'Quantity', 'Revenue', periods=7, n_jobs=1)